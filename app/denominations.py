@@ -0,0 +1,66 @@
+from functools import lru_cache, reduce
+from math import gcd
+
+from app.config import settings
+
+# Settings are fixed per process, so denomination data is computed once.
+DENOM_GCD = reduce(gcd, settings.SUPPORTED_DENOMINATIONS)
+DENOMS_DESC = tuple(sorted(settings.SUPPORTED_DENOMINATIONS, reverse=True))
+_DENOM_KEYS = tuple(zip(DENOMS_DESC, map(str, DENOMS_DESC)))
+# With a unit denomination every positive amount is representable
+HAS_UNIT_DENOM = DENOMS_DESC[-1] == 1
+# Every multiple of the GCD above min * max // GCD is representable (Schur's
+# bound on the Frobenius number of the coins divided by their GCD), so exact
+# answers are only needed below it.
+_VALID_AMOUNT_CAP = DENOMS_DESC[-1] * DENOMS_DESC[0] // DENOM_GCD
+
+
+def _representable_amounts(limit: int) -> frozenset[int]:
+    # Work on the coins divided by their GCD, so e.g. a cents-style set
+    # needs a table of limit // GCD entries, then scale the results back up.
+    coins = tuple(d // DENOM_GCD for d in DENOMS_DESC)
+    steps = limit // DENOM_GCD
+    reachable = [True] + [False] * steps
+    for amount in range(1, steps + 1):
+        reachable[amount] = any(
+            c <= amount and reachable[amount - c] for c in coins
+        )
+    return frozenset(a * DENOM_GCD for a in range(1, steps + 1) if reachable[a])
+
+
+_VALID_AMOUNTS = (
+    frozenset() if HAS_UNIT_DENOM else _representable_amounts(_VALID_AMOUNT_CAP)
+)
+
+
+def is_valid_amount(amount: int) -> bool:
+    """Check if amount can be constructed using supported denominations."""
+    if HAS_UNIT_DENOM:
+        return amount > 0
+    if amount <= _VALID_AMOUNT_CAP:
+        return amount in _VALID_AMOUNTS
+    return amount % DENOM_GCD == 0
+
+
+def can_make_change(change: int) -> bool:
+    """Check if change can be paid by the greedy breakdown used to dispense it."""
+    # Unlike cash_inserted, change must match how breakdown() pays it: with
+    # {2, 5}, 6 is representable (2+2+2) but greedy pays 5 and is left with 1.
+    remaining = change
+    for d in DENOMS_DESC:
+        remaining %= d
+    return remaining == 0
+
+
+@lru_cache(maxsize=1024)
+def breakdown(change: int) -> tuple[tuple[str, int], ...]:
+    """Greedy breakdown of change; returned as a tuple so cached entries stay immutable."""
+    result: list[tuple[str, int]] = []
+    remaining = change
+    for d, key in _DENOM_KEYS:
+        count, remaining = divmod(remaining, d)
+        if count:
+            result.append((key, count))
+        if not remaining:
+            break
+    return tuple(result)
@@ -15,38 +15,28 @@ router = APIRouter()
 @router.post("/purchase", response_model=PurchaseResponse)
 def purchase(data: PurchaseRequest, db: Session = Depends(get_db)):
     try:
-        result = purchase_service.purchase(db, data.item_id, data.cash_inserted)
-        return PurchaseResponse(**result)
-    except ValueError as e:
-        if e.args[0] == "item_not_found":
-            raise HTTPException(status_code=404, detail="Item not found")
-        if e.args[0] == "out_of_stock":
-            raise HTTPException(
-                status_code=400,
-                detail={"error": "Item out of stock"},
-            )
-        if e.args[0] == "insufficient_cash":
-            required = e.args[1]
-            inserted = e.args[2]
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error": "Insufficient cash",
-                    "required": required,
-                    "inserted": inserted,
-                },
-            )
-        if e.args[0] == "invalid_denomination":
-            raise HTTPException(
-                status_code=400,
-                detail="Cash inserted must use supported denominations"
-            )
-        if e.args[0] == "cannot_make_change":
-            raise HTTPException(
-                status_code=400,
-                detail="Cannot make change with available denominations"
-            )
-        raise
+        return purchase_service.purchase(db, data.item_id, data.cash_inserted)
+    except purchase_service.ItemNotFound:
+        raise HTTPException(status_code=404, detail="Item not found")
+    except purchase_service.OutOfStock:
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "Item out of stock"},
+        )
+    except purchase_service.InsufficientCash as e:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Insufficient cash",
+                "required": e.price,
+                "inserted": e.inserted,
+            },
+        )
+    except purchase_service.CannotMakeChange:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot make change with available denominations"
+        )
 
 
 @router.get("/purchase/change-breakdown", response_model=ChangeBreakdownResponse)
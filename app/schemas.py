@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+from app.denominations import is_valid_amount
 
 
 # --- Slot ---
@@ -74,6 +76,14 @@ class PurchaseRequest(BaseModel):
     item_id: str
     cash_inserted: int = Field(..., ge=0)
 
+    @field_validator("cash_inserted")
+    @classmethod
+    def check_denomination(cls, v: int) -> int:
+        # Reject before the request reaches the service and the database
+        if not is_valid_amount(v):
+            raise ValueError("Cash inserted must use supported denominations")
+        return v
+
 
 class PurchaseResponse(BaseModel):
     item: str
@@ -81,7 +91,7 @@ class PurchaseResponse(BaseModel):
     cash_inserted: int
     change_returned: int
     remaining_quantity: int
-    message: str
+    message: str = "Purchase successful"
 
 
 class InsufficientCashError(BaseModel):
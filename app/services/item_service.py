@@ -6,7 +6,7 @@ from app.schemas import ItemBulkEntry, ItemCreate
 
 
 def add_item_to_slot(db: Session, slot_id: str, data: ItemCreate) -> Item:
-    slot = db.query(Slot).filter(Slot.id == slot_id).first()
+    slot = db.get(Slot, slot_id)
     if not slot:
         raise ValueError("slot_not_found")
     if slot.current_item_count + data.quantity > slot.capacity:
@@ -29,7 +29,7 @@ def add_item_to_slot(db: Session, slot_id: str, data: ItemCreate) -> Item:
 
 
 def bulk_add_items(db: Session, slot_id: str, entries: list[ItemBulkEntry]) -> int:
-    slot = db.query(Slot).filter(Slot.id == slot_id).first()
+    slot = db.get(Slot, slot_id)
     if not slot:
         raise ValueError("slot_not_found")
     
@@ -58,14 +58,14 @@ def bulk_add_items(db: Session, slot_id: str, entries: list[ItemBulkEntry]) -> i
 
 
 def list_items_by_slot(db: Session, slot_id: str) -> list[Item]:
-    slot = db.query(Slot).filter(Slot.id == slot_id).first()
+    slot = db.get(Slot, slot_id)
     if not slot:
         raise ValueError("slot_not_found")
     return list(slot.items)
 
 
 def get_item_by_id(db: Session, item_id: str) -> Item | None:
-    return db.query(Item).filter(Item.id == item_id).first()
+    return db.get(Item, item_id)
 
 
 def update_item_price(db: Session, item_id: str, price: int) -> None:
@@ -80,7 +80,7 @@ def update_item_price(db: Session, item_id: str, price: int) -> None:
 def remove_item_quantity(
     db: Session, slot_id: str, item_id: str, quantity: int | None
 ) -> None:
-    slot = db.query(Slot).filter(Slot.id == slot_id).first()
+    slot = db.get(Slot, slot_id)
     if not slot:
         raise ValueError("slot_not_found")
     item = db.query(Item).filter(Item.id == item_id, Item.slot_id == slot_id).first()
@@ -101,7 +101,7 @@ def remove_item_quantity(
 def bulk_remove_items(
     db: Session, slot_id: str, item_ids: list[str] | None
 ) -> None:
-    slot = db.query(Slot).filter(Slot.id == slot_id).first()
+    slot = db.get(Slot, slot_id)
     if not slot:
         raise ValueError("slot_not_found")
     if item_ids is not None and len(item_ids) > 0:
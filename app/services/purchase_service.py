@@ -1,76 +1,83 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
-from app.config import settings
-from app.models import Item
+from app.denominations import HAS_UNIT_DENOM, breakdown, can_make_change
+from app.models import Item, Slot
+from app.schemas import PurchaseResponse
 
 
-def purchase(db: Session, item_id: str, cash_inserted: int) -> dict:
-    # Validate cash_inserted uses supported denominations
-    if not _is_valid_denomination_amount(cash_inserted):
-        raise ValueError("invalid_denomination")
-    
-    item = db.query(Item).filter(Item.id == item_id).first()
-    if not item:
-        raise ValueError("item_not_found")
-    
-    if item.quantity <= 0:
-        raise ValueError("out_of_stock")
-    
-    if cash_inserted < item.price:
-        raise ValueError("insufficient_cash", item.price, cash_inserted)
-    
-    change = cash_inserted - item.price
-    
-    # Validate that change can be made with supported denominations
-    if not _can_make_change(change):
-        raise ValueError("cannot_make_change")
-    
-    # Perform the purchase transaction atomically
-    item.quantity -= 1
-    if item.slot:
-        item.slot.current_item_count -= 1
-    
-    db.commit()
-    db.refresh(item)
-    
-    return {
-        "item": item.name,
-        "price": item.price,
-        "cash_inserted": cash_inserted,
-        "change_returned": change,
-        "remaining_quantity": item.quantity,
-        "message": "Purchase successful",
-    }
+class PurchaseError(ValueError):
+    """Base class for purchase failures reported to the client."""
+
+
+class ItemNotFound(PurchaseError):
+    pass
 
 
-def _is_valid_denomination_amount(amount: int) -> bool:
-    """Check if amount can be constructed using supported denominations."""
-    if amount <= 0:
-        return False
+class OutOfStock(PurchaseError):
+    pass
+
+
+class InsufficientCash(PurchaseError):
+    def __init__(self, price: int, inserted: int):
+        super().__init__(price, inserted)
+        self.price = price
+        self.inserted = inserted
+
+
+class CannotMakeChange(PurchaseError):
+    pass
+
+
+def purchase(db: Session, item_id: str, cash_inserted: int) -> PurchaseResponse:
+    # cash_inserted is checked against supported denominations by
+    # PurchaseRequest. Decrement stock in a single conditional UPDATE so
+    # concurrent buyers cannot both take the last unit
+    row = db.execute(
+        update(Item)
+        .where(
+            Item.id == item_id,
+            Item.quantity > 0,
+            Item.price <= cash_inserted,
+        )
+        .values(quantity=Item.quantity - 1)
+        .returning(Item.name, Item.price, Item.quantity, Item.slot_id)
+    ).first()
+    if row is None:
+        # Nothing was updated; look the item up to report why
+        item = db.get(Item, item_id)
+        if not item:
+            raise ItemNotFound()
+        if item.price > cash_inserted and item.quantity > 0:
+            raise InsufficientCash(item.price, cash_inserted)
+        # Out of stock, or stock/price changed after the UPDATE ran; never
+        # report insufficient cash when the price is covered.
+        raise OutOfStock()
     
-    denominations = sorted(settings.SUPPORTED_DENOMINATIONS, reverse=True)
-    remaining = amount
+    change = cash_inserted - row.price
     
-    for denom in denominations:
-        remaining = remaining % denom
+    # Validate that change can be made with supported denominations. The
+    # UPDATE guarantees change >= 0, and with a unit denomination any
+    # non-negative change can be made, so the check is skipped entirely.
+    if not HAS_UNIT_DENOM and not can_make_change(change):
+        db.rollback()
+        raise CannotMakeChange()
     
-    return remaining == 0
-
-
-def _can_make_change(change: int) -> bool:
-    """Check if change can be made using supported denominations."""
-    return _is_valid_denomination_amount(change) if change > 0 else True
+    db.execute(
+        update(Slot)
+        .where(Slot.id == row.slot_id)
+        .values(current_item_count=Slot.current_item_count - 1)
+    )
+    db.commit()
+    
+    return PurchaseResponse(
+        item=row.name,
+        price=row.price,
+        cash_inserted=cash_inserted,
+        change_returned=change,
+        remaining_quantity=row.quantity,
+    )
 
 
 def change_breakdown(change: int) -> dict:
-    denominations = sorted(settings.SUPPORTED_DENOMINATIONS, reverse=True)
-    result: dict[str, int] = {}
-    remaining = change
-    for d in denominations:
-        if remaining <= 0:
-            break
-        count = remaining // d
-        if count > 0:
-            result[str(d)] = count
-            remaining -= count * d
-    return {"change": change, "denominations": result}
+    return {"change": change, "denominations": dict(breakdown(change))}
@@ -24,7 +24,7 @@ def list_slots(db: Session) -> list[Slot]:
 
 
 def get_slot_by_id(db: Session, slot_id: str) -> Slot | None:
-    return db.query(Slot).filter(Slot.id == slot_id).first()
+    return db.get(Slot, slot_id)
 
 
 def delete_slot(db: Session, slot_id: str) -> None:
@@ -1,166 +1,174 @@
 #!/usr/bin/env python3
 """
 Test script to verify all the bug fixes work correctly.
-Run this after setting up the virtual environment and installing dependencies.
+Run this after setting up the virtual environment and installing dependencies
+(the script itself needs httpx: pip install httpx).
+
+The checks run concurrently, so several test slots exist at once. Make sure
+the database has at least 6 free slots below MAX_SLOTS (10 by default),
+otherwise slot creation fails with "Slot limit reached".
 
 Usage:
     python test_fixes.py
 """
 
-import requests
+import asyncio
+import io
 import json
-import time
+import os
+import sys
+
+import httpx
 
 BASE_URL = "http://127.0.0.1:8000"
 
-def print_test(name):
-    print(f"\n🧪 Testing: {name}")
-    print("-" * 50)
+def print_test(log, name):
+    log(f"\n🧪 Testing: {name}")
+    log("-" * 50)
+
+async def _make_slot_with_items(client, code, capacity, items=()):
+    """Create a slot and stock it with one bulk request; returns the slot id."""
+    slot_response = await client.post("/slots", json={"code": code, "capacity": capacity})
+    slot_response.raise_for_status()
+    slot_id = slot_response.json()["id"]
+    if items:
+        bulk_response = await client.post(
+            f"/slots/{slot_id}/items/bulk", json={"items": list(items)}
+        )
+        bulk_response.raise_for_status()
+    return slot_id
+
+async def _purge(client, slot_id):
+    """Clear every item from a slot in one request, then delete the slot."""
+    await client.delete(f"/slots/{slot_id}/items")
+    await client.delete(f"/slots/{slot_id}")
 
-def test_health():
-    print_test("Health Check")
+async def test_health(client, log):
+    print_test(log, "Health Check")
     try:
-        response = requests.get(f"{BASE_URL}/health")
-        print(f"Status: {response.status_code}")
-        print(f"Response: {response.json()}")
+        response = await client.get("/health")
+        log(f"Status: {response.status_code}")
+        log(f"Response: {response.json()}")
         return response.status_code == 200
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log(f"❌ Error: {e}")
         return False
 
-def test_denomination_validation():
-    print_test("Denomination Validation (Fix #1)")
-    print("Testing change breakdown with 1 and 2 INR denominations...")
+async def test_denomination_validation(client, log):
+    print_test(log, "Denomination Validation (Fix #1)")
+    log("Testing change breakdown with 1 and 2 INR denominations...")
     
     try:
         # Test change that requires 1 and 2 INR coins
-        response = requests.get(f"{BASE_URL}/purchase/change-breakdown?change=18")
-        print(f"Status: {response.status_code}")
+        response = await client.get("/purchase/change-breakdown?change=18")
+        log(f"Status: {response.status_code}")
         result = response.json()
-        print(f"Change breakdown for 18: {result}")
+        log(f"Change breakdown for 18: {result}")
         
         # Should include 10, 5, 2, 1 coins
         denominations = result.get("denominations", {})
         has_small_denominations = "1" in denominations or "2" in denominations
-        print(f"✅ Contains 1 or 2 INR coins: {has_small_denominations}")
+        log(f"✅ Contains 1 or 2 INR coins: {has_small_denominations}")
         return has_small_denominations
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log(f"❌ Error: {e}")
         return False
 
-def test_zero_price_validation():
-    print_test("Zero Price Validation (Fix #2)")
+async def test_zero_price_validation(client, log):
+    print_test(log, "Zero Price Validation (Fix #2)")
     
     try:
         # First create a slot
-        slot_data = {"code": "TEST1", "capacity": 10}
-        slot_response = requests.post(f"{BASE_URL}/slots", json=slot_data)
-        
-        if slot_response.status_code != 201:
-            print("❌ Failed to create test slot")
-            return False
-        
-        slot_id = slot_response.json()["id"]
-        print(f"Created test slot: {slot_id}")
+        slot_id = await _make_slot_with_items(client, "TEST1", 10)
+        log(f"Created test slot: {slot_id}")
         
         # Try to create item with 0 price (should fail)
         item_data = {"name": "Free Item", "price": 0, "quantity": 1}
-        response = requests.post(f"{BASE_URL}/slots/{slot_id}/items", json=item_data)
+        response = await client.post(f"/slots/{slot_id}/items", json=item_data)
         
-        print(f"Status: {response.status_code}")
-        print(f"Response: {response.json() if response.headers.get('content-type') == 'application/json' else response.text}")
+        log(f"Status: {response.status_code}")
+        log(f"Response: {response.json() if response.headers.get('content-type') == 'application/json' else response.text}")
         
         # Should return 422 (validation error)
         success = response.status_code == 422
-        print(f"✅ Correctly rejected zero price: {success}")
+        log(f"✅ Correctly rejected zero price: {success}")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/slots/{slot_id}")
+        await client.delete(f"/slots/{slot_id}")
         return success
         
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log(f"❌ Error: {e}")
         return False
 
-def test_slot_deletion_with_items():
-    print_test("Slot Deletion with Items (Fix #4)")
+async def test_slot_deletion_with_items(client, log):
+    print_test(log, "Slot Deletion with Items (Fix #4)")
     
     try:
-        # Create a slot
-        slot_data = {"code": "TEST2", "capacity": 10}
-        slot_response = requests.post(f"{BASE_URL}/slots", json=slot_data)
-        slot_id = slot_response.json()["id"]
-        print(f"Created test slot: {slot_id}")
-        
-        # Add an item to the slot
-        item_data = {"name": "Test Item", "price": 10, "quantity": 1}
-        item_response = requests.post(f"{BASE_URL}/slots/{slot_id}/items", json=item_data)
-        print(f"Added item to slot")
+        # Create a slot holding one item
+        slot_id = await _make_slot_with_items(
+            client, "TEST2", 10, [{"name": "Test Item", "price": 10, "quantity": 1}]
+        )
+        log(f"Created test slot with an item: {slot_id}")
         
         # Try to delete slot with items (should fail)
-        response = requests.delete(f"{BASE_URL}/slots/{slot_id}")
-        print(f"Status: {response.status_code}")
-        print(f"Response: {response.json() if response.headers.get('content-type') == 'application/json' else response.text}")
+        response = await client.delete(f"/slots/{slot_id}")
+        log(f"Status: {response.status_code}")
+        log(f"Response: {response.json() if response.headers.get('content-type') == 'application/json' else response.text}")
         
         success = response.status_code == 400
-        print(f"✅ Correctly prevented deletion of slot with items: {success}")
+        log(f"✅ Correctly prevented deletion of slot with items: {success}")
         
         # Cleanup - remove items first, then slot
-        requests.delete(f"{BASE_URL}/slots/{slot_id}/items")
-        requests.delete(f"{BASE_URL}/slots/{slot_id}")
+        await _purge(client, slot_id)
         
         return success
         
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log(f"❌ Error: {e}")
         return False
 
-def test_capacity_logic():
-    print_test("Capacity Logic (Fix #5 - CRITICAL)")
+async def test_capacity_logic(client, log):
+    print_test(log, "Capacity Logic (Fix #5 - CRITICAL)")
     
     try:
         # Create a slot with small capacity
-        slot_data = {"code": "TEST3", "capacity": 3}
-        slot_response = requests.post(f"{BASE_URL}/slots", json=slot_data)
-        slot_id = slot_response.json()["id"]
-        print(f"Created test slot with capacity 3: {slot_id}")
+        slot_id = await _make_slot_with_items(client, "TEST3", 3)
+        log(f"Created test slot with capacity 3: {slot_id}")
         
         # Add items up to capacity (should succeed)
         item_data = {"name": "Test Item", "price": 10, "quantity": 3}
-        response = requests.post(f"{BASE_URL}/slots/{slot_id}/items", json=item_data)
+        response = await client.post(f"/slots/{slot_id}/items", json=item_data)
         
-        print(f"Status: {response.status_code}")
-        print(f"Response: {response.json() if response.headers.get('content-type') == 'application/json' else response.text}")
+        log(f"Status: {response.status_code}")
+        log(f"Response: {response.json() if response.headers.get('content-type') == 'application/json' else response.text}")
         
         success = response.status_code == 201
-        print(f"✅ Successfully added items up to capacity: {success}")
+        log(f"✅ Successfully added items up to capacity: {success}")
         
         # Try to add more items (should fail)
         item_data2 = {"name": "Extra Item", "price": 10, "quantity": 1}
-        response2 = requests.post(f"{BASE_URL}/slots/{slot_id}/items", json=item_data2)
+        response2 = await client.post(f"/slots/{slot_id}/items", json=item_data2)
         
         capacity_check = response2.status_code == 400
-        print(f"✅ Correctly rejected exceeding capacity: {capacity_check}")
+        log(f"✅ Correctly rejected exceeding capacity: {capacity_check}")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/slots/{slot_id}/items")
-        requests.delete(f"{BASE_URL}/slots/{slot_id}")
+        await _purge(client, slot_id)
         
         return success and capacity_check
         
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log(f"❌ Error: {e}")
         return False
 
-def test_bulk_operations():
-    print_test("Bulk Operations (Fix #5)")
+async def test_bulk_operations(client, log):
+    print_test(log, "Bulk Operations (Fix #5)")
     
     try:
         # Create a slot
-        slot_data = {"code": "TEST4", "capacity": 5}
-        slot_response = requests.post(f"{BASE_URL}/slots", json=slot_data)
-        slot_id = slot_response.json()["id"]
-        print(f"Created test slot: {slot_id}")
+        slot_id = await _make_slot_with_items(client, "TEST4", 5)
+        log(f"Created test slot: {slot_id}")
         
         # Bulk add items within capacity
         bulk_data = {
@@ -169,13 +177,13 @@ def test_bulk_operations():
                 {"name": "Item 2", "price": 15, "quantity": 2}
             ]
         }
-        response = requests.post(f"{BASE_URL}/slots/{slot_id}/items/bulk", json=bulk_data)
+        response = await client.post(f"/slots/{slot_id}/items/bulk", json=bulk_data)
         
-        print(f"Status: {response.status_code}")
-        print(f"Response: {response.json()}")
+        log(f"Status: {response.status_code}")
+        log(f"Response: {response.json()}")
         
         success = response.status_code == 200
-        print(f"✅ Bulk add within capacity succeeded: {success}")
+        log(f"✅ Bulk add within capacity succeeded: {success}")
         
         # Try to bulk add items that would exceed capacity
         bulk_data2 = {
@@ -183,21 +191,195 @@ def test_bulk_operations():
                 {"name": "Item 3", "price": 20, "quantity": 5}  # Would exceed capacity
             ]
         }
-        response2 = requests.post(f"{BASE_URL}/slots/{slot_id}/items/bulk", json=bulk_data2)
+        response2 = await client.post(f"/slots/{slot_id}/items/bulk", json=bulk_data2)
         
         capacity_check = response2.status_code == 400
-        print(f"✅ Correctly rejected bulk add exceeding capacity: {capacity_check}")
+        log(f"✅ Correctly rejected bulk add exceeding capacity: {capacity_check}")
         
         # Cleanup
-        requests.delete(f"{BASE_URL}/slots/{slot_id}/items")
-        requests.delete(f"{BASE_URL}/slots/{slot_id}")
+        await _purge(client, slot_id)
         
         return success and capacity_check
         
     except Exception as e:
-        print(f"❌ Error: {e}")
+        log(f"❌ Error: {e}")
         return False
 
+async def _slot_item_count(client, slot_id):
+    response = await client.get("/slots")
+    return next(s["current_item_count"] for s in response.json() if s["id"] == slot_id)
+
+async def test_purchase_flow(client, log):
+    print_test(log, "Purchase Flow and Stock Counters")
+    
+    try:
+        # Create a slot holding two units of one item
+        slot_id = await _make_slot_with_items(
+            client, "TEST5", 5, [{"name": "Soda", "price": 15, "quantity": 2}]
+        )
+        item_id = (await client.get(f"/slots/{slot_id}/items")).json()[0]["id"]
+        log(f"Created test slot with 2 units: {slot_id}")
+        
+        # Buy one unit with change due
+        response = await client.post("/purchase", json={"item_id": item_id, "cash_inserted": 20})
+        result = response.json()
+        log(f"Status: {response.status_code}")
+        log(f"Response: {result}")
+        slot_count = await _slot_item_count(client, slot_id)
+        bought = (
+            response.status_code == 200
+            and result["change_returned"] == 5
+            and result["remaining_quantity"] == 1
+            and slot_count == 1
+        )
+        log(f"✅ Purchase succeeded and counters decremented (slot count {slot_count}): {bought}")
+        
+        # Buy the last unit with exact cash
+        response = await client.post("/purchase", json={"item_id": item_id, "cash_inserted": 15})
+        log(f"Status: {response.status_code}")
+        log(f"Response: {response.json()}")
+        slot_count = await _slot_item_count(client, slot_id)
+        last_unit = (
+            response.status_code == 200
+            and response.json()["remaining_quantity"] == 0
+            and slot_count == 0
+        )
+        log(f"✅ Last unit sold and slot count reached 0: {last_unit}")
+        
+        # Buying again should report out of stock
+        response = await client.post("/purchase", json={"item_id": item_id, "cash_inserted": 15})
+        log(f"Status: {response.status_code}")
+        log(f"Response: {response.json()}")
+        out_of_stock = (
+            response.status_code == 400
+            and response.json()["detail"] == {"error": "Item out of stock"}
+        )
+        log(f"✅ Correctly reported out of stock: {out_of_stock}")
+        
+        # Cleanup
+        await _purge(client, slot_id)
+        
+        return bought and last_unit and out_of_stock
+        
+    except Exception as e:
+        log(f"❌ Error: {e}")
+        return False
+
+async def test_purchase_errors(client, log):
+    print_test(log, "Purchase Error Responses")
+    
+    try:
+        # Create a slot holding one item
+        slot_id = await _make_slot_with_items(
+            client, "TEST6", 5, [{"name": "Chips", "price": 40, "quantity": 1}]
+        )
+        item_id = (await client.get(f"/slots/{slot_id}/items")).json()[0]["id"]
+        log(f"Created test slot: {slot_id}")
+        
+        # Insufficient cash should report required and inserted amounts
+        response = await client.post("/purchase", json={"item_id": item_id, "cash_inserted": 30})
+        log(f"Status: {response.status_code}")
+        log(f"Response: {response.json()}")
+        insufficient = response.status_code == 400 and response.json()["detail"] == {
+            "error": "Insufficient cash",
+            "required": 40,
+            "inserted": 30,
+        }
+        log(f"✅ Correctly rejected insufficient cash: {insufficient}")
+        
+        # The failed purchase must not touch stock
+        item = (await client.get(f"/items/{item_id}")).json()
+        untouched = item["quantity"] == 1 and await _slot_item_count(client, slot_id) == 1
+        log(f"✅ Stock unchanged after failed purchase: {untouched}")
+        
+        # Unknown item should be a 404
+        response = await client.post(
+            "/purchase",
+            json={"item_id": "00000000-0000-0000-0000-000000000000", "cash_inserted": 10},
+        )
+        log(f"Status: {response.status_code}")
+        log(f"Response: {response.json()}")
+        not_found = response.status_code == 404
+        log(f"✅ Correctly returned 404 for unknown item: {not_found}")
+        
+        # Cleanup
+        await _purge(client, slot_id)
+        
+        return insufficient and untouched and not_found
+        
+    except Exception as e:
+        log(f"❌ Error: {e}")
+        return False
+
+# Run against the app's denomination helpers with a coin set that greedy
+# change-making cannot always pay. Settings are read at import, so this runs
+# in a separate interpreter with SUPPORTED_DENOMINATIONS overridden.
+GREEDY_CHANGE_CHECK = """
+from app.denominations import breakdown, can_make_change, is_valid_amount
+assert is_valid_amount(6) and is_valid_amount(8), "6 and 8 are valid cash with {2, 5}"
+assert not can_make_change(6), "greedy pays 6 as 5 and cannot pay the last 1"
+assert dict(breakdown(6)) == {"5": 1}
+assert can_make_change(4) and dict(breakdown(4)) == {"2": 2}
+assert can_make_change(7) and dict(breakdown(7)) == {"5": 1, "2": 1}
+assert can_make_change(0)
+"""
+
+async def test_greedy_change_check(client, log):
+    print_test(log, "Change Check Matches Greedy Breakdown ({2, 5} coins)")
+    
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-c", GREEDY_CHANGE_CHECK,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env={**os.environ, "SUPPORTED_DENOMINATIONS": "[2, 5]"},
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+        if stderr:
+            log(stderr.decode().strip().splitlines()[-1])
+        
+        success = proc.returncode == 0
+        log(f"✅ Change of 6 rejected, greedy-payable change accepted: {success}")
+        return success
+        
+    except Exception as e:
+        log(f"❌ Error: {e}")
+        return False
+
+def _buffered_log():
+    """Return a print-like function that writes to its own buffer, and the buffer."""
+    buffer = io.StringIO()
+    def log(*args, **kwargs):
+        print(*args, file=buffer, **kwargs)
+    return log, buffer
+
+async def run_tests(tests):
+    # Each test uses its own slot code, so they are independent and can
+    # share one connection pool and run concurrently. Output is buffered
+    # per test and printed as one block so it stays readable.
+    logs = [_buffered_log() for _ in tests]
+    async with httpx.AsyncClient(base_url=BASE_URL) as client:
+        tasks = [
+            asyncio.create_task(test_func(client, log))
+            for (_, test_func), (log, _) in zip(tests, logs)
+        ]
+        try:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        except asyncio.CancelledError:
+            # Ctrl-C cancels the unfinished checks; keep the finished ones
+            print("\n❌ Testing interrupted by user")
+    results = []
+    for (test_name, _), (_, buffer), task in zip(tests, logs, tasks):
+        if task.cancelled():
+            continue
+        print(buffer.getvalue(), end="")
+        outcome = task.exception() or task.result()
+        if isinstance(outcome, Exception):
+            print(f"❌ Test {test_name} failed with error: {outcome}")
+            outcome = False
+        results.append((test_name, outcome))
+    return results
+
 def main():
     print("🔧 Vending Machine API - Bug Fix Verification")
     print("=" * 60)
@@ -215,20 +397,16 @@ def main():
         ("Slot Deletion with Items", test_slot_deletion_with_items),
         ("Capacity Logic (CRITICAL FIX)", test_capacity_logic),
         ("Bulk Operations", test_bulk_operations),
+        ("Purchase Flow", test_purchase_flow),
+        ("Purchase Errors", test_purchase_errors),
+        ("Greedy Change Check", test_greedy_change_check),
     ]
     
     results = []
-    for test_name, test_func in tests:
-        try:
-            result = test_func()
-            results.append((test_name, result))
-            time.sleep(1)  # Small delay between tests
-        except KeyboardInterrupt:
-            print("\n❌ Testing interrupted by user")
-            break
-        except Exception as e:
-            print(f"❌ Test {test_name} failed with error: {e}")
-            results.append((test_name, False))
+    try:
+        results = asyncio.run(run_tests(tests))
+    except KeyboardInterrupt:
+        print("\n❌ Testing interrupted by user")
     
     # Print summary
     print("\n" + "=" * 60)